@@ -0,0 +1,328 @@
+import os
+import re
+import sys
+import json
+import threading
+import numpy as np
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from _pinecone.embedding_store import exclusive_file_lock, text_hash
+
+# Directory for storing category centroids and text assignments
+CATEGORY_STORE_DIR = Path("category_store")
+
+CENTROIDS_FILE = "centroids.json"
+TEXTS_FILE = "texts.log"
+LOCK_FILE = "router.lock"
+
+# Namespace used when no categories exist yet, and by everything upserted before partitioning
+DEFAULT_NAMESPACE = ""
+
+# Minimum cosine similarity for a topic to join an existing category instead of starting a new one
+CATEGORY_MERGE_THRESHOLD = 0.6
+
+# A second partition is searched only when it scores within this margin of the best one
+ROUTER_MARGIN = 0.1
+
+
+def slugify_topic(topic: str) -> str:
+    """
+    Turn a topic into a Pinecone-friendly namespace name.
+    """
+    slug = re.sub(r"[^a-z0-9]+", "-", topic.lower()).strip("-")
+    return slug[:64] or "general"
+
+
+def _normalize(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class CategoryAssignment:
+    """
+    Result of CategoryRouter.assign: the texts grouped by namespace, plus the
+    centroid updates to apply with CategoryRouter.commit once they are stored.
+    """
+
+    def __init__(self):
+        self.groups: Dict[str, List[str]] = {}
+        self.sums: Dict[str, np.ndarray] = {}
+        self.counts: Dict[str, int] = {}
+        self.text_namespaces: Dict[str, str] = {}
+
+
+class CategoryRouter:
+    """
+    Assigns keywords to category namespaces by nearest topic centroid and
+    routes queries to the most relevant categories.
+
+    Each category keeps the running sum and count of the vectors assigned to
+    it, so its centroid follows the keywords it holds. Every text remembers
+    the namespace it was first written to, so re-upserting it never creates
+    a duplicate in another partition.
+
+    Centroids live in a small JSON file and text assignments in an append-only
+    log of text hashes. Writes hold an exclusive file lock and first catch up
+    with changes made by other processes, and reads pick those changes up too.
+    """
+
+    def __init__(self, model_version: str, store_dir: Path = CATEGORY_STORE_DIR):
+        self.model_version = model_version
+        self.store_dir = store_dir
+        self._lock = threading.RLock()
+        self._sums: Dict[str, np.ndarray] = {}
+        self._counts: Dict[str, int] = {}
+        self._text_namespaces: Dict[int, str] = {}
+        self._default_reindexed = False
+        self._names: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._centroids_stamp: Optional[Tuple[int, int, int]] = None
+        self._texts_offset = 0
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._refresh()
+        print(f"✓ Loaded {len(self._names)} category centroids from {self.store_dir}")
+
+    @property
+    def _centroids_path(self) -> Path:
+        return self.store_dir / CENTROIDS_FILE
+
+    @property
+    def _texts_path(self) -> Path:
+        return self.store_dir / TEXTS_FILE
+
+    @property
+    def _lock_path(self) -> Path:
+        return self.store_dir / LOCK_FILE
+
+    @property
+    def namespaces(self) -> List[str]:
+        with self._lock:
+            self._refresh_centroids()
+            return list(self._names)
+
+    @property
+    def default_reindexed(self) -> bool:
+        with self._lock:
+            self._refresh_centroids()
+            return self._default_reindexed
+
+    def _refresh(self):
+        """
+        Catch up with centroids and text assignments written by any process.
+        """
+        self._refresh_centroids()
+        self._refresh_texts()
+
+    def _refresh_centroids(self):
+        """
+        Reload the centroids file if it changed since it was last read.
+        """
+        try:
+            stat = self._centroids_path.stat()
+        except FileNotFoundError:
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        if stamp == self._centroids_stamp:
+            return
+
+        try:
+            with open(self._centroids_path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Warning: Failed to load category centroids: {e}")
+            return
+
+        self._centroids_stamp = stamp
+        if data.get("model") != self.model_version:
+            print(f"Category centroids were built for '{data.get('model')}', ignoring them")
+            return
+
+        self._sums = {name: np.asarray(category["sum"], dtype=np.float32) for name, category in data.get("categories", {}).items()}
+        self._counts = {name: int(category["count"]) for name, category in data.get("categories", {}).items()}
+        self._default_reindexed = bool(data.get("default_reindexed", False))
+        self._rebuild()
+
+    def _refresh_texts(self):
+        """
+        Read text assignments appended to the log since it was last read.
+        """
+        try:
+            size = self._texts_path.stat().st_size
+        except FileNotFoundError:
+            return
+        if size < self._texts_offset:
+            # The log was replaced, so read it again from the start
+            self._text_namespaces = {}
+            self._texts_offset = 0
+        if size == self._texts_offset:
+            return
+
+        with open(self._texts_path, "rb") as f:
+            f.seek(self._texts_offset)
+            data = f.read(size - self._texts_offset)
+
+        # Only consume complete lines, a writer may still be appending the last one
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            key, _, name = line.partition(" ")
+            if key:
+                self._text_namespaces.setdefault(int(key, 16), sys.intern(name))
+        self._texts_offset += len(complete)
+
+    def _save_centroids(self):
+        data = {
+            "model": self.model_version,
+            "categories": {
+                name: {"sum": self._sums[name].tolist(), "count": self._counts[name]}
+                for name in self._names
+            },
+            "default_reindexed": self._default_reindexed,
+        }
+        tmp_path = self._centroids_path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self._centroids_path)
+        stat = self._centroids_path.stat()
+        self._centroids_stamp = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def _rebuild(self):
+        """
+        Refresh the normalized centroid matrix used for routing.
+        """
+        self._names = list(self._sums.keys())
+        if self._names:
+            self._matrix = np.stack([_normalize(self._sums[name] / self._counts[name]) for name in self._names])
+        else:
+            self._matrix = None
+
+    @staticmethod
+    def _scores(vectors: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms) @ matrix.T
+
+    def _unique_name(self, topic: str) -> str:
+        """
+        Namespace name for a new category, suffixed when another category already has that slug.
+        """
+        base = slugify_topic(topic)
+        name, suffix = base, 2
+        while name in self._sums:
+            name = f"{base}-{suffix}"
+            suffix += 1
+        return name
+
+    def assign(
+        self,
+        texts: List[str],
+        vectors: List[List[float]],
+        topic: Optional[str] = None,
+        topic_vector: Optional[List[float]] = None
+    ) -> CategoryAssignment:
+        """
+        Group texts by the category namespace they belong to, without changing any state.
+
+        When a topic is given it either joins the nearest existing category or
+        seeds a new one. Texts seen before keep their namespace, and new texts go
+        to their nearest centroid. Call commit() once the texts are stored.
+        """
+        assignment = CategoryAssignment()
+
+        with self._lock:
+            self._refresh()
+            sums = dict(self._sums)
+            counts = dict(self._counts)
+
+            if topic and topic_vector is not None:
+                topic_array = np.asarray(topic_vector, dtype=np.float32)
+                best = None
+                if self._matrix is not None:
+                    scores = self._scores(topic_array[None, :], self._matrix)[0]
+                    if scores.max() >= CATEGORY_MERGE_THRESHOLD:
+                        best = self._names[int(scores.argmax())]
+                if best is None:
+                    best = self._unique_name(topic)
+                    print(f"[category_router] Creating category '{best}' for topic '{topic}'")
+                sums[best] = sums.get(best, np.zeros_like(topic_array)) + topic_array
+                counts[best] = counts.get(best, 0) + 1
+                assignment.sums[best] = topic_array
+                assignment.counts[best] = 1
+
+            names = list(sums.keys())
+            if not names:
+                assignment.groups[DEFAULT_NAMESPACE] = list(texts)
+                return assignment
+            matrix = np.stack([_normalize(sums[name] / counts[name]) for name in names])
+
+            text_array = np.asarray(vectors, dtype=np.float32)
+            nearest = self._scores(text_array, matrix).argmax(axis=1)
+
+            for text, vector, row in zip(texts, text_array, nearest):
+                name = self._text_namespaces.get(text_hash(text)) or assignment.text_namespaces.get(text)
+                if name is None:
+                    name = names[int(row)]
+                    assignment.text_namespaces[text] = name
+                    assignment.sums[name] = assignment.sums.get(name, np.zeros_like(vector)) + vector
+                    assignment.counts[name] = assignment.counts.get(name, 0) + 1
+                assignment.groups.setdefault(name, []).append(text)
+
+        return assignment
+
+    def commit(self, assignment: CategoryAssignment):
+        """
+        Apply the centroid updates of an assignment whose texts were stored successfully.
+        """
+        if not assignment.counts and not assignment.text_namespaces:
+            return
+
+        with self._lock, exclusive_file_lock(self._lock_path):
+            self._refresh()
+
+            for name, delta in assignment.sums.items():
+                self._sums[name] = self._sums.get(name, np.zeros_like(delta)) + delta
+                self._counts[name] = self._counts.get(name, 0) + assignment.counts[name]
+            self._rebuild()
+            self._save_centroids()
+
+            lines = []
+            for text, name in assignment.text_namespaces.items():
+                key = text_hash(text)
+                if key not in self._text_namespaces:
+                    self._text_namespaces[key] = sys.intern(name)
+                    lines.append(f"{key:016x} {name}\n")
+            if lines:
+                with open(self._texts_path, "ab") as f:
+                    f.write("".join(lines).encode("utf-8"))
+                self._texts_offset = self._texts_path.stat().st_size
+
+    def mark_default_reindexed(self):
+        """
+        Record that the default namespace has been moved into categories,
+        so queries no longer need to search it.
+        """
+        with self._lock, exclusive_file_lock(self._lock_path):
+            self._refresh()
+            self._default_reindexed = True
+            self._save_centroids()
+
+    def route(self, query_vector: List[float], max_partitions: int = 2) -> List[str]:
+        """
+        Return the namespaces to search for a query vector: the one or two most
+        relevant categories, plus the default namespace until it has been re-indexed.
+        """
+        with self._lock:
+            self._refresh_centroids()
+            matrix, names = self._matrix, self._names
+            default_reindexed = self._default_reindexed
+        if matrix is None:
+            return [DEFAULT_NAMESPACE]
+
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
+        scores = matrix @ query
+        order = np.argsort(-scores)[:max_partitions]
+        best_score = scores[order[0]]
+        routed = [names[int(i)] for i in order if scores[i] >= best_score - ROUTER_MARGIN]
+        if not default_reindexed:
+            routed.append(DEFAULT_NAMESPACE)
+        return routed
@@ -0,0 +1,327 @@
+import os
+import json
+import uuid
+import hashlib
+import threading
+import numpy as np
+from contextlib import contextmanager
+from pathlib import Path
+from langchain_core.embeddings import Embeddings
+from typing import List, Dict, Optional
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+# Directory for storing the persistent embedding store
+EMBEDDING_STORE_DIR = Path("embedding_store")
+
+VECTORS_FILE = "vectors.f16"
+KEYS_FILE = "keys.u64"
+META_FILE = "meta.json"
+LOCK_FILE = "store.lock"
+
+# Rows reserved up front whenever the vectors file has to grow
+INITIAL_CAPACITY = 1024
+
+
+def text_hash(text: str) -> int:
+    """
+    Compact 64-bit hash of a keyword text, used as the row index key.
+    """
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@contextmanager
+def exclusive_file_lock(lock_path: Path):
+    """
+    Hold an exclusive OS-level lock on `lock_path`, so that only one process
+    (e.g. the reloader parent and child, or several WSGI workers) writes at a time.
+    """
+    with open(lock_path, "a+b") as f:
+        if os.name == "nt":
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if os.name == "nt":
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class EmbeddingStore:
+    """
+    Append-only on-disk embedding store keyed by text.
+
+    Vectors live in a memory-mapped float16 matrix, and a parallel array of
+    text hashes maps each text to its row. The store is stamped with the model
+    name and dimension, so switching models discards the stale vectors.
+
+    Writes take an exclusive file lock and first catch up with rows appended
+    by other processes, so every process agrees on which row holds which text.
+    """
+
+    def __init__(self, model_version: str, dim: int, store_dir: Path = EMBEDDING_STORE_DIR):
+        self.model_version = model_version
+        self.dim = dim
+        self.store_dir = store_dir
+        self._lock = threading.RLock()
+        self._index: Dict[int, int] = {}
+        self._count = 0
+        self._capacity = 0
+        self._generation: Optional[str] = None
+        self._vectors: Optional[np.memmap] = None
+        self.store_dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, exclusive_file_lock(self._lock_path):
+            self._load()
+
+    @property
+    def _vectors_path(self) -> Path:
+        return self.store_dir / VECTORS_FILE
+
+    @property
+    def _keys_path(self) -> Path:
+        return self.store_dir / KEYS_FILE
+
+    @property
+    def _meta_path(self) -> Path:
+        return self.store_dir / META_FILE
+
+    @property
+    def _lock_path(self) -> Path:
+        return self.store_dir / LOCK_FILE
+
+    @property
+    def _row_bytes(self) -> int:
+        return self.dim * np.dtype(np.float16).itemsize
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _read_meta(self) -> Optional[dict]:
+        if not self._meta_path.exists():
+            return None
+        try:
+            with open(self._meta_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: Failed to read embedding store metadata: {e}")
+            return None
+
+    def _load(self):
+        """
+        Open the store from disk, resetting it if the model stamp does not match.
+        Must be called with the file lock held.
+        """
+        meta = self._read_meta()
+        if not meta or meta.get("model") != self.model_version or meta.get("dim") != self.dim:
+            if meta:
+                print(f"Embedding store was built for '{meta.get('model')}', resetting for '{self.model_version}'")
+            self._reset()
+            return
+
+        # The file may have been replaced by another process, so never reuse the old mapping
+        self._close_mapping()
+        self._generation = meta.get("generation")
+        keys = np.fromfile(self._keys_path, dtype=np.uint64) if self._keys_path.exists() else np.empty(0, dtype=np.uint64)
+        stored_rows = self._vectors_path.stat().st_size // self._row_bytes if self._vectors_path.exists() else 0
+
+        # Rows are only trusted once both the vector and its key made it to disk
+        self._count = min(int(meta.get("count", 0)), len(keys), stored_rows)
+        self._index = {int(key): row for row, key in enumerate(keys[:self._count])}
+        self._remap(stored_rows)
+
+        if len(keys) > self._count:
+            with open(self._keys_path, "r+b") as f:
+                f.truncate(self._count * np.dtype(np.uint64).itemsize)
+
+        print(f"✓ Embedding store loaded with {self._count} vectors from {self.store_dir}")
+
+    def _refresh(self):
+        """
+        Catch up with rows appended by other processes since the last load.
+        Must be called with the file lock held.
+        """
+        meta = self._read_meta()
+        disk_count = int(meta.get("count", 0)) if meta else 0
+        if not meta or meta.get("generation") != self._generation or disk_count < self._count:
+            # Another process reset the store, so start over from disk
+            self._load()
+            return
+        if disk_count == self._count:
+            return
+
+        item_size = np.dtype(np.uint64).itemsize
+        new_keys = np.fromfile(self._keys_path, dtype=np.uint64, count=disk_count - self._count, offset=self._count * item_size)
+        for offset, key in enumerate(new_keys):
+            self._index[int(key)] = self._count + offset
+        self._count += len(new_keys)
+        self._remap(self._vectors_path.stat().st_size // self._row_bytes)
+
+    def _close_mapping(self):
+        """
+        Unmap the vectors file. Windows refuses to resize a file with an open mapped view.
+        """
+        if self._vectors is not None:
+            self._vectors.flush()
+            self._vectors._mmap.close()
+            self._vectors = None
+        self._capacity = 0
+
+    def _remap(self, rows: int):
+        """
+        Map the first `rows` rows of the vectors file, if that differs from the current mapping.
+        """
+        if rows == self._capacity and (self._vectors is not None or rows == 0):
+            return
+        self._close_mapping()
+        if rows:
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float16, mode="r+", shape=(rows, self.dim))
+        self._capacity = rows
+
+    def _reset(self):
+        """
+        Discard all stored vectors and start an empty store for the current model.
+        """
+        self._close_mapping()
+        for path in (self._vectors_path, self._keys_path):
+            if path.exists():
+                path.unlink()
+        self._index = {}
+        self._count = 0
+        self._generation = uuid.uuid4().hex
+        self._write_meta()
+
+    def _write_meta(self):
+        tmp_path = self._meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "model": self.model_version,
+                "dim": self.dim,
+                "count": self._count,
+                "generation": self._generation
+            }, f)
+        os.replace(tmp_path, self._meta_path)
+
+    def _ensure_capacity(self, rows: int):
+        """
+        Grow the vectors file so that it can hold at least `rows` rows.
+        """
+        if rows <= self._capacity:
+            return
+
+        new_capacity = max(rows, self._capacity * 2, INITIAL_CAPACITY)
+        self._close_mapping()
+        with open(self._vectors_path, "ab") as f:
+            f.truncate(new_capacity * self._row_bytes)
+        self._remap(new_capacity)
+
+    def get(self, text: str) -> Optional[np.ndarray]:
+        """
+        Return the stored vector for `text` as a zero-copy view into the mmap, or None.
+        The view is only valid until the store next grows, so do not hold on to it.
+        """
+        with self._lock:
+            row = self._index.get(text_hash(text))
+            if row is None:
+                return None
+            return self._vectors[row]
+
+    def lookup(self, text: str) -> Optional[List[float]]:
+        """
+        Return the stored vector for `text` as a list of floats, or None.
+        """
+        with self._lock:
+            vector = self.get(text)
+            return vector.astype(np.float32).tolist() if vector is not None else None
+
+    def add(self, texts: List[str], vectors: List[List[float]]):
+        """
+        Append vectors for texts that are not stored yet.
+        """
+        with self._lock, exclusive_file_lock(self._lock_path):
+            self._refresh()
+
+            new_keys = []
+            new_rows = []
+            seen = set()
+            for text, vector in zip(texts, vectors):
+                key = text_hash(text)
+                if key in self._index or key in seen:
+                    continue
+                seen.add(key)
+                new_keys.append(key)
+                new_rows.append(vector)
+
+            if not new_keys:
+                return
+
+            start = self._count
+            self._ensure_capacity(start + len(new_keys))
+            self._vectors[start:start + len(new_keys)] = np.asarray(new_rows, dtype=np.float16)
+            self._vectors.flush()
+
+            # Drop any keys a crashed writer left past the trusted count before appending
+            with open(self._keys_path, "ab") as f:
+                f.truncate(start * np.dtype(np.uint64).itemsize)
+                np.asarray(new_keys, dtype=np.uint64).tofile(f)
+
+            for offset, key in enumerate(new_keys):
+                self._index[key] = start + offset
+            self._count = start + len(new_keys)
+            self._write_meta()
+
+    def clear(self):
+        """
+        Remove every stored vector.
+        """
+        with self._lock, exclusive_file_lock(self._lock_path):
+            self._reset()
+
+
+class StoredEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves vectors from an EmbeddingStore and only
+    encodes texts the store has not seen before.
+    """
+
+    def __init__(self, embeddings: Embeddings, store: EmbeddingStore):
+        self.embeddings = embeddings
+        self.store = store
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+
+        for i, text in enumerate(texts):
+            vector = self.store.lookup(text)
+            if vector is not None:
+                results[i] = vector
+            else:
+                missing.setdefault(text, []).append(i)
+
+        if missing:
+            missing_texts = list(missing.keys())
+            print(f"[embedding_store] Encoding {len(missing_texts)} of {len(texts)} texts")
+            encoded = self.embeddings.embed_documents(missing_texts)
+            self.store.add(missing_texts, encoded)
+            for text, vector in zip(missing_texts, encoded):
+                for i in missing[text]:
+                    results[i] = list(vector)
+
+        return results
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.store.lookup(text)
+        if vector is not None:
+            return vector
+
+        encoded = self.embeddings.embed_query(text)
+        self.store.add([text], [encoded])
+        return encoded
@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any
+from _pinecone.category_router import CategoryRouter
+
+# Upper bound on concurrent Pinecone queries issued by multi-namespace searches
+QUERY_MAX_WORKERS = 8
+
+# Number of best routed matches that must pass the threshold to skip the fallback.
+# Kept small and independent of top_k, so "get everything" queries still stay in their partitions.
+ROUTING_CHECK_K = 1
+
+# Shared by every request, so the thread count stays fixed however many namespaces exist
+_query_executor = ThreadPoolExecutor(max_workers=QUERY_MAX_WORKERS, thread_name_prefix="pinecone-query")
+
+
+def query_namespace(index: Any, query_embedding: List[float], top_k: int, namespace: str) -> List[Any]:
+    """
+    Query a single Pinecone namespace and return its matches.
+    """
+    query_response = index.query(
+        vector=query_embedding,
+        top_k=top_k,
+        include_metadata=True,
+        include_values=False,
+        namespace=namespace
+    )
+    return list(query_response.matches)
+
+
+def query_namespaces(index: Any, query_embedding: List[float], top_k: int, namespaces: List[str]) -> List[Any]:
+    """
+    Query several Pinecone namespaces in parallel and merge their matches by score.
+    """
+    if len(namespaces) == 1:
+        return query_namespace(index, query_embedding, top_k, namespaces[0])
+
+    results = _query_executor.map(lambda ns: query_namespace(index, query_embedding, top_k, ns), namespaces)
+    matches = [match for namespace_matches in results for match in namespace_matches]
+
+    matches.sort(key=lambda match: match.score, reverse=True)
+    return matches[:top_k]
+
+
+def query_partitioned(
+    index: Any,
+    router: CategoryRouter,
+    query_embedding: List[float],
+    top_k: int,
+    similarity_threshold: float = 0.0,
+    namespace: str = ""
+) -> List[Any]:
+    """
+    Query the partitioned index and return matches sorted by score.
+
+    An explicit namespace is searched as-is. Otherwise the category router picks
+    the one or two most relevant partitions (plus the default namespace until it
+    has been re-indexed). Only when fewer than ROUTING_CHECK_K routed matches pass
+    the threshold, i.e. routing missed, are the remaining partitions searched too.
+
+    Args:
+        index: Pinecone index
+        router: Category router used to pick partitions
+        query_embedding: Dense query vector
+        top_k: Number of matches to return
+        similarity_threshold: Minimum score for a routed match to count as a hit
+        namespace: Pinecone namespace to search in, empty to route automatically
+
+    Returns:
+        List of Pinecone matches
+    """
+    if namespace:
+        return query_namespace(index, query_embedding, top_k, namespace)
+
+    routed = router.route(query_embedding)
+    print(f"[query_partitioned] Routed query to namespaces: {routed}")
+    matches = query_namespaces(index, query_embedding, top_k, routed)
+
+    passed = sum(1 for match in matches if match.score >= similarity_threshold)
+    if passed >= min(top_k, ROUTING_CHECK_K):
+        return matches
+
+    remaining = [ns for ns in router.namespaces if ns not in routed]
+    if not remaining:
+        return matches
+
+    print(f"[query_partitioned] Only {passed} routed matches passed {similarity_threshold}, falling back to {len(remaining)} namespaces")
+    fallback = query_namespaces(index, query_embedding, top_k, remaining)
+    merged = sorted(matches + fallback, key=lambda match: match.score, reverse=True)
+    return merged[:top_k]
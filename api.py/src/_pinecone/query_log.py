@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import random
+import logging
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+from _pinecone.result_cache import normalize_keywords
+
+# Directory for the append-only query logs. Each process writes its own file
+# (query_log.<pid>.jsonl), because rotating a file shared between processes is unsafe.
+QUERY_LOG_DIR = Path("query_logs")
+QUERY_LOG_MAX_BYTES = 5 * 1024 * 1024
+QUERY_LOG_BACKUP_COUNT = 3
+
+# Logs of processes that stopped writing this long ago are removed
+QUERY_LOG_RETENTION_SECONDS = 7 * 24 * 60 * 60
+
+# Fraction of search requests written to the query log
+QUERY_LOG_SAMPLE_RATE = 0.1
+
+# Number of most frequent queries replayed at startup
+PREWARM_TOP_N = 50
+
+_query_logger = logging.getLogger("skill_swap.query_log")
+_query_logger.setLevel(logging.INFO)
+_query_logger.propagate = False
+_query_log_handler: Optional[RotatingFileHandler] = None
+_query_log_pid: Optional[int] = None
+
+
+def _get_query_logger() -> logging.Logger:
+    """
+    Attach this process's rotating file handler on first use, or after a fork.
+    """
+    global _query_log_handler, _query_log_pid
+
+    pid = os.getpid()
+    if _query_log_handler is None or _query_log_pid != pid:
+        if _query_log_handler is not None:
+            # Inherited from the parent process, which keeps writing its own file
+            _query_logger.removeHandler(_query_log_handler)
+        QUERY_LOG_DIR.mkdir(parents=True, exist_ok=True)
+        _query_log_handler = RotatingFileHandler(
+            QUERY_LOG_DIR / f"query_log.{pid}.jsonl",
+            maxBytes=QUERY_LOG_MAX_BYTES,
+            backupCount=QUERY_LOG_BACKUP_COUNT,
+            encoding="utf-8"
+        )
+        _query_log_handler.setFormatter(logging.Formatter("%(message)s"))
+        _query_logger.addHandler(_query_log_handler)
+        _query_log_pid = pid
+    return _query_logger
+
+
+def log_query(endpoint: str, keywords: List[str], **params: Any):
+    """
+    Append a sampled keyword search to the query log.
+
+    Entries are grouped by their normalized keywords, and also keep the exact
+    keyword order so that a replay embeds the same query string as real traffic.
+
+    Args:
+        endpoint: Search endpoint the query came from ('keywords' or 'keywords-direct')
+        keywords: Raw keywords from the request
+        **params: Search parameters needed to replay the query
+    """
+    if random.random() >= QUERY_LOG_SAMPLE_RATE:
+        return
+
+    if not isinstance(keywords, list):
+        return
+    cleaned = [kw.strip() for kw in keywords if isinstance(kw, str) and kw.strip()]
+    if not cleaned:
+        return
+
+    try:
+        entry = {"endpoint": endpoint, "keywords": normalize_keywords(cleaned), "query": cleaned, "params": params}
+        _get_query_logger().info(json.dumps(entry, sort_keys=True))
+    except Exception as e:
+        print(f"Warning: Failed to write query log entry: {e}")
+
+
+def _query_log_paths() -> List[Path]:
+    return sorted(QUERY_LOG_DIR.glob("query_log.*.jsonl*")) if QUERY_LOG_DIR.exists() else []
+
+
+def prune_query_logs(retention_seconds: float = QUERY_LOG_RETENTION_SECONDS) -> int:
+    """
+    Remove query logs that have not been written to within the retention period.
+
+    Returns:
+        Number of files removed
+    """
+    cutoff = time.time() - retention_seconds
+    removed = 0
+    for path in _query_log_paths():
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except OSError as e:
+            print(f"Warning: Failed to prune query log {path}: {e}")
+    return removed
+
+
+def load_top_queries(top_n: int = PREWARM_TOP_N) -> List[Tuple[Dict[str, Any], int]]:
+    """
+    Merge the query logs of every process and return the most frequent queries.
+
+    Queries are counted by endpoint, normalized keywords and parameters, and
+    each returned entry carries the keyword order seen most often for it.
+
+    Returns:
+        List of (query entry, frequency) tuples, most frequent first
+    """
+    counts: Counter = Counter()
+    orders: Dict[str, Counter] = {}
+    for path in _query_log_paths():
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if not isinstance(entry, dict) or not entry.get("keywords"):
+                        continue
+                    key = json.dumps(
+                        {"endpoint": entry.get("endpoint"), "keywords": entry["keywords"], "params": entry.get("params", {})},
+                        sort_keys=True
+                    )
+                    counts[key] += 1
+                    orders.setdefault(key, Counter())[json.dumps(entry.get("query") or entry["keywords"])] += 1
+        except Exception as e:
+            print(f"Warning: Failed to read query log {path}: {e}")
+
+    top_queries = []
+    for key, frequency in counts.most_common(top_n):
+        entry = json.loads(key)
+        entry["query"] = json.loads(orders[key].most_common(1)[0][0])
+        top_queries.append((entry, frequency))
+    return top_queries
@@ -0,0 +1,61 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+# Default bounds for the keyword search result cache
+RESULT_CACHE_SIZE = 1024
+RESULT_CACHE_TTL_SECONDS = 600
+
+
+def normalize_keywords(keywords: List[str]) -> List[str]:
+    """
+    Normalize a keyword list into a sorted set of lowercase keywords.
+    Used for the result cache key and to group query log entries, so that
+    queries differing only in keyword order or case are treated as one.
+    """
+    return sorted({kw.strip().lower() for kw in keywords if isinstance(kw, str) and kw.strip()})
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of search results whose entries expire after a TTL.
+    """
+
+    def __init__(self, max_size: int = RESULT_CACHE_SIZE, ttl_seconds: float = RESULT_CACHE_TTL_SECONDS):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: tuple) -> Optional[List[str]]:
+        """
+        Return a copy of the cached results for `key`, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_at, results = entry
+            if time.monotonic() - cached_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return list(results)
+
+    def set(self, key: tuple, results: List[str]):
+        """
+        Cache results for `key`, evicting the least recently used entries when full.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -1,5 +1,6 @@
 import os
 import pickle
+import threading
 from pathlib import Path
 from langchain_community.retrievers  import PineconeHybridSearchRetriever
 from pinecone import Pinecone,ServerlessSpec
@@ -7,17 +8,36 @@ from langchain_huggingface import HuggingFaceEmbeddings
 from pinecone_text.sparse import BM25Encoder
 from langchain_core.documents import Document
 from typing import List, Dict, Any, Optional
+from _pinecone.embedding_store import EmbeddingStore, StoredEmbeddings
+from _pinecone.category_router import CategoryRouter, DEFAULT_NAMESPACE
+from _pinecone.partitioned_query import query_partitioned
+from _pinecone.result_cache import ResultCache, normalize_keywords
+from _pinecone.query_log import PREWARM_TOP_N, load_top_queries, prune_query_logs
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 
 # Global instances
 _hf_embeddings: Optional[HuggingFaceEmbeddings] = None
+_embedding_store: Optional[EmbeddingStore] = None
+_stored_embeddings: Optional[StoredEmbeddings] = None
+_category_router: Optional[CategoryRouter] = None
 _pinecone_client: Optional[Pinecone] = None
 _bm25_encoder: Optional[BM25Encoder] = None
 _pinecone_index: Optional[Any] = None
 _retriever: Optional[PineconeHybridSearchRetriever] = None
 
+# Serializes lazy initialization, e.g. the startup thread racing the first requests
+_init_lock = threading.Lock()
+
 # Path for storing BM25 encoder
 BM25_CACHE_PATH = Path("bm25_encoder_cache.pkl")
 
+# In-process cache of keyword search results, cleared whenever new texts are upserted
+_result_cache = ResultCache()
+
+# Vectors moved per batch when re-indexing the default namespace into categories
+REINDEX_BATCH_SIZE = 100
+
 
 def save_bm25_encoder(encoder: BM25Encoder, cache_path: Path = BM25_CACHE_PATH):
     """
@@ -54,7 +74,7 @@ def initialize_global_instances():
     Initialize global instances for embeddings, Pinecone client, and encoder.
     This should be called once when the API starts.
     """
-    global _hf_embeddings, _pinecone_client, _bm25_encoder, _pinecone_index, _retriever
+    global _hf_embeddings, _embedding_store, _stored_embeddings, _category_router, _pinecone_client, _bm25_encoder, _pinecone_index, _retriever
     
     try:
         # Get environment variables
@@ -67,9 +87,21 @@ def initialize_global_instances():
             os.environ["HF_TOKEN"] = hf_token
         
         # Initialize HuggingFace embeddings
-        _hf_embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        _hf_embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
         print("✓ HuggingFace embeddings initialized")
         
+        # Open the persistent embedding store shared by the search and upsert paths
+        _embedding_store = EmbeddingStore(
+            model_version=EMBEDDING_MODEL_NAME,
+            dim=_hf_embeddings._client.get_sentence_embedding_dimension()
+        )
+        _stored_embeddings = StoredEmbeddings(_hf_embeddings, _embedding_store)
+        print(f"✓ Embedding store initialized ({len(_embedding_store)} cached vectors)")
+        
+        # Load category centroids used to partition the index into namespaces
+        _category_router = CategoryRouter(model_version=EMBEDDING_MODEL_NAME)
+        print(f"✓ Category router initialized ({len(_category_router.namespaces)} categories)")
+        
         # Initialize Pinecone client
         _pinecone_client = Pinecone(api_key=api_key)
         print("✓ Pinecone client initialized")
@@ -90,7 +122,7 @@ def initialize_global_instances():
         
         # Initialize retriever
         _retriever = PineconeHybridSearchRetriever(
-            embeddings=_hf_embeddings, 
+            embeddings=_stored_embeddings, 
             sparse_encoder=_bm25_encoder, 
             index=_pinecone_index
         )
@@ -107,10 +139,12 @@ def get_global_retriver():
     """
     Get the global instances. Initialize them if they don't exist.
     """
-    global _hf_embeddings, _pinecone_client, _bm25_encoder, _pinecone_index, _retriever
+    global _hf_embeddings, _embedding_store, _stored_embeddings, _category_router, _pinecone_client, _bm25_encoder, _pinecone_index, _retriever
     
     if _retriever is None:
-        initialize_global_instances()
+        with _init_lock:
+            if _retriever is None:
+                initialize_global_instances()
     
     return _retriever
 
@@ -130,6 +164,28 @@ def clear_bm25_cache(cache_path: Path = BM25_CACHE_PATH):
         print(f"Error clearing BM25 encoder cache: {e}")
 
 
+def clear_embedding_store():
+    """
+    Clear the persistent embedding store.
+    Useful if you want to force every text to be re-encoded.
+    """
+    try:
+        if _embedding_store is not None:
+            _embedding_store.clear()
+            print("✓ Embedding store cleared")
+        else:
+            print("No embedding store initialized to clear")
+    except Exception as e:
+        print(f"Error clearing embedding store: {e}")
+
+
+def clear_result_cache():
+    """
+    Clear the in-process keyword search result cache.
+    """
+    _result_cache.clear()
+
+
 def get_retrieval_results(queries: list[str]):
     """
     Get retrieval results using global instances for maximum efficiency.
@@ -184,12 +240,15 @@ def get_retrieval_results(queries: list[str]):
 
 def upsert_text_to_pinecone(
     texts: List[str],
+    topic: Optional[str] = None,
 ) -> bool:
     """
     Upsert text documents into Pinecone database using global instances for maximum efficiency.
+    Documents are partitioned into category namespaces by nearest topic centroid.
     
     Args:
         texts: List of text documents to upsert
+        topic: Topic the documents were generated for, used to seed or pick their category
         
     Returns:
         bool: True if upsert was successful, False otherwise
@@ -206,8 +265,23 @@ def upsert_text_to_pinecone(
         # Get global instances
         retriever = get_global_retriver()
         
-        # Use the global retriever instance to add texts
-        retriever.add_texts(texts)
+        # Assign each text to a category namespace (vectors come from the embedding store)
+        if not isinstance(topic, str) or not topic.strip():
+            topic = None
+        vectors = _stored_embeddings.embed_documents(texts)
+        topic_vector = _stored_embeddings.embed_query(topic) if topic else None
+        assignment = _category_router.assign(texts, vectors, topic=topic, topic_vector=topic_vector)
+        
+        # Use the global retriever instance to add texts, one namespace at a time
+        for namespace, namespace_texts in assignment.groups.items():
+            retriever.add_texts(namespace_texts, namespace=namespace)
+            print(f"✓ Upserted {len(namespace_texts)} documents to namespace '{namespace}'")
+        
+        # Only move the centroids once the texts are actually stored
+        _category_router.commit(assignment)
+        
+        # Cached search results may now be missing the new texts
+        clear_result_cache()
         
         print(f"Successfully upserted {len(texts)} documents to Pinecone index.")
         return True
@@ -216,6 +290,84 @@ def upsert_text_to_pinecone(
         print(f"Error during upsert to Pinecone: {e}")
         return False
 
+
+def reindex_default_namespace(batch_size: int = REINDEX_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Move vectors upserted before partitioning from the default namespace into
+    category namespaces. Once every vector has been moved, queries stop searching
+    the default namespace. Vectors without text metadata cannot be assigned to a
+    category, so they stay where they are and keep the default namespace searched.
+    
+    Args:
+        batch_size: Number of vectors fetched, re-upserted and deleted at a time
+        
+    Returns:
+        Dict with the number of vectors "moved" and the ids that were "skipped"
+    """
+    retriever = get_global_retriver()
+    
+    if not _category_router.namespaces:
+        print("[reindex_default_namespace] No categories yet, nothing to re-index into")
+        return {"moved": 0, "skipped": []}
+    
+    # Collect every id first, so deleting moved vectors does not disturb pagination
+    ids = [
+        vector_id
+        for page in _pinecone_index.list(namespace=DEFAULT_NAMESPACE, limit=batch_size)
+        for vector_id in page
+    ]
+    print(f"[reindex_default_namespace] Re-indexing {len(ids)} vectors from the default namespace")
+    
+    moved = 0
+    skipped = []
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        fetched = _pinecone_index.fetch(ids=batch_ids, namespace=DEFAULT_NAMESPACE).vectors
+        records = {}
+        for record in fetched.values():
+            if record.metadata and record.metadata.get(retriever.text_key):
+                records[record.metadata[retriever.text_key]] = record
+            else:
+                skipped.append(record.id)
+        if not records:
+            continue
+        
+        texts = list(records.keys())
+        vectors = [list(records[text].values) for text in texts]
+        
+        # Reuse the stored dense vectors instead of re-encoding them later
+        _embedding_store.add(texts, vectors)
+        assignment = _category_router.assign(texts, vectors)
+        
+        for namespace, namespace_texts in assignment.groups.items():
+            upserts = []
+            for text in namespace_texts:
+                record = records[text]
+                upsert = {"id": record.id, "values": list(record.values), "metadata": record.metadata}
+                if record.sparse_values:
+                    upsert["sparse_values"] = {
+                        "indices": list(record.sparse_values.indices),
+                        "values": list(record.sparse_values.values)
+                    }
+                upserts.append(upsert)
+            _pinecone_index.upsert(vectors=upserts, namespace=namespace)
+        
+        _category_router.commit(assignment)
+        _pinecone_index.delete(ids=[records[text].id for text in texts], namespace=DEFAULT_NAMESPACE)
+        moved += len(texts)
+        print(f"✓ Moved {moved} of {len(ids)} vectors into category namespaces")
+    
+    clear_result_cache()
+    
+    if skipped:
+        print(f"⚠ Skipped {len(skipped)} vectors without '{retriever.text_key}' metadata, the default namespace stays searchable: {skipped}")
+    else:
+        _category_router.mark_default_reindexed()
+    
+    print(f"Re-indexed {moved} vectors from the default namespace")
+    return {"moved": moved, "skipped": skipped}
+
+
 def query_keywords_from_pinecone(
     keywords: List[str], 
     similarity_threshold: float = 0.0,
@@ -227,7 +379,7 @@ def query_keywords_from_pinecone(
     Args:
         keywords: List of input keywords to search for
         similarity_threshold: Minimum similarity score to include results
-        namespace: Pinecone namespace to search in
+        namespace: Pinecone namespace to search in, empty to route by category
         
     Returns:
         List of relevant keywords extracted from Pinecone results
@@ -249,31 +401,38 @@ def query_keywords_from_pinecone(
     
     try:
         # Get global instances
-        global _hf_embeddings, _pinecone_index
+        global _stored_embeddings, _category_router, _pinecone_index
+        
+        # Queries that differ only in keyword order or case share a result cache entry
+        cache_key = ("query", tuple(normalize_keywords(cleaned_keywords)), similarity_threshold, namespace)
+        cached_results = _result_cache.get(cache_key)
+        if cached_results is not None:
+            print(f"✓ Served {len(cached_results)} keywords from result cache")
+            return cached_results
         
-        if _hf_embeddings is None or _pinecone_index is None:
-            initialize_global_instances()
+        get_global_retriver()
         
         # Create combined query from keywords
         combined_query = " ".join(cleaned_keywords)
         
         # Generate embedding for the query
-        query_embedding = _hf_embeddings.embed_query(combined_query)
+        query_embedding = _stored_embeddings.embed_query(combined_query)
         print(f"✓ Generated embedding for query: '{combined_query}'")
         
-        # Query Pinecone index directly - set very high top_k to get all results
-        query_response = _pinecone_index.query(
-            vector=query_embedding,
-            top_k=100, 
-            include_metadata=True,
-            include_values=False,
-            namespace=""
+        # Query the routed partitions - set very high top_k to get all results
+        matches = query_partitioned(
+            _pinecone_index,
+            _category_router,
+            query_embedding,
+            top_k=100,
+            similarity_threshold=similarity_threshold,
+            namespace=namespace
         )
-        print(f"✓ Pinecone returned {len(query_response.matches)} matches")
+        print(f"✓ Pinecone returned {len(matches)} matches")
         
         # Extract and process results
         relevant_keywords = []
-        for match in query_response.matches:
+        for match in matches:
             score = match.score
             print(f"Match score: {score:.4f}")
             
@@ -304,6 +463,7 @@ def query_keywords_from_pinecone(
         print(f"Final result: {len(unique_keywords)} unique relevant keywords")
         print(f"Relevant keywords: {unique_keywords}")
         
+        _result_cache.set(cache_key, unique_keywords)
         return unique_keywords
         
     except Exception as e:
@@ -386,7 +546,7 @@ def search_keywords(
         keywords: List of input keywords to search for
         top_k: Number of top results to retrieve from Pinecone
         similarity_threshold: Minimum similarity score to include results
-        namespace: Pinecone namespace to search in
+        namespace: Pinecone namespace to search in, empty to route by category
         
     Returns:
         List of text content from matching documents
@@ -407,29 +567,36 @@ def search_keywords(
     
     try:
         # Get global instances
-        global _hf_embeddings, _pinecone_index
+        global _stored_embeddings, _category_router, _pinecone_index
+        
+        # Queries that differ only in keyword order or case share a result cache entry
+        cache_key = ("search", tuple(normalize_keywords(cleaned_keywords)), top_k, similarity_threshold, namespace)
+        cached_results = _result_cache.get(cache_key)
+        if cached_results is not None:
+            print(f"✓ Served {len(cached_results)} results from result cache")
+            return cached_results
         
-        if _hf_embeddings is None or _pinecone_index is None:
-            initialize_global_instances()
+        get_global_retriver()
         
         # Create combined query from keywords
         combined_query = " ".join(cleaned_keywords)
         
         # Generate embedding for the query
-        query_embedding = _hf_embeddings.embed_query(combined_query)
+        query_embedding = _stored_embeddings.embed_query(combined_query)
         
-        # Query Pinecone index directly
-        query_response = _pinecone_index.query(
-            vector=query_embedding,
+        # Query the routed partitions
+        matches = query_partitioned(
+            _pinecone_index,
+            _category_router,
+            query_embedding,
             top_k=top_k,
-            include_metadata=True,
-            include_values=False,
+            similarity_threshold=similarity_threshold,
             namespace=namespace
         )
         
         # Extract text content from results
         results = []
-        for match in query_response.matches:
+        for match in matches:
             score = match.score
             
             if score >= similarity_threshold:
@@ -446,6 +613,7 @@ def search_keywords(
                         print(f"✓ Added result (score: {score:.4f}): {text_content[:100]}...")
         
         print(f"Found {len(results)} relevant text results")
+        _result_cache.set(cache_key, results)
         return results
         
     except Exception as e:
@@ -453,5 +621,37 @@ def search_keywords(
         return []
 
 
-
-
+def prewarm_caches(top_n: int = PREWARM_TOP_N) -> int:
+    """
+    Replay the most frequent logged queries to fill the embedding and result caches.
+    Each query is replayed in the keyword order seen most often, so the embedding
+    store gets the exact query strings that real traffic embeds.
+    
+    Args:
+        top_n: Number of most frequent queries to replay
+        
+    Returns:
+        Number of queries replayed
+    """
+    prune_query_logs()
+    top_queries = load_top_queries(top_n)
+    if not top_queries:
+        print("No logged queries found, skipping cache prewarm")
+        return 0
+    
+    print(f"Prewarming caches with {len(top_queries)} most frequent queries...")
+    replayed = 0
+    for entry, frequency in top_queries:
+        params = entry.get("params", {})
+        keywords = entry.get("query") or entry["keywords"]
+        try:
+            if entry.get("endpoint") == "keywords-direct":
+                search_keywords(keywords=keywords, **params)
+            else:
+                query_keywords_from_pinecone(keywords=keywords, **params)
+            replayed += 1
+        except Exception as e:
+            print(f"Warning: Failed to replay query {entry.get('keywords')} (seen {frequency} times): {e}")
+    
+    print(f"✓ Prewarmed caches with {replayed} queries")
+    return replayed
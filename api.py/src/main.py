@@ -1,11 +1,19 @@
+import os
+import threading
 from flask import Flask, request, jsonify
 from routes.agent import agents_bp
 from routes.llm import llm_bp
 from dotenv import load_dotenv
-from _pinecone.retreiver import initialize_global_instances
+from _pinecone.retreiver import get_global_retriver, prewarm_caches
+
+# Load environment variables before anything reads them
+load_dotenv()
 
 app = Flask(__name__)
 
+# Set once caches have been prewarmed and the API can take traffic
+_ready = threading.Event()
+
 app.register_blueprint(agents_bp, url_prefix='/api/v1')
 app.register_blueprint(llm_bp, url_prefix='/api/v1')
 
@@ -16,26 +24,65 @@ def main():
 def index():
     return main()
 
+@app.route('/ready')
+def ready():
+    """
+    Readiness probe, only reports ready once initialization and cache prewarming have finished.
+    """
+    if not _ready.is_set():
+        return jsonify({"ready": False}), 503
+    return jsonify({"ready": True}), 200
+
+_startup_lock = threading.Lock()
+_startup_thread = None
+
 def initialize_api():
     """
-    Initialize API components including global instances.
+    Initialize API components including global instances, then prewarm the
+    caches from the query log and mark the API as ready.
     """
     try:
-        # Load environment variables first
-        load_dotenv()
-        
         # Initialize global Pinecone instances
         print("Initializing global Pinecone instances...")
-        initialize_global_instances()
+        get_global_retriver()
         print("✓ API initialization completed successfully!")
-        
     except Exception as e:
         print(f"❌ Error during API initialization: {e}")
-        raise
+        return
+
+    try:
+        prewarm_caches()
+    except Exception as e:
+        print(f"Warning: Cache prewarm failed: {e}")
+    finally:
+        _ready.set()
+
+def start_initialization():
+    """
+    Start initialize_api in a background thread of the current process, unless
+    it is already running or done. Threads do not survive a fork, so this runs
+    in the process that serves requests rather than at import time (which would
+    also break importing `app` without credentials).
+    """
+    global _startup_thread
+
+    with _startup_lock:
+        if _ready.is_set() or (_startup_thread is not None and _startup_thread.is_alive()):
+            return
+        _startup_thread = threading.Thread(target=initialize_api, daemon=True)
+        _startup_thread.start()
+
+@app.before_request
+def ensure_initialization_started():
+    # The first request (usually the readiness probe) starts initialization
+    # under any server: python src/main.py, flask run, gunicorn with or without --preload
+    start_initialization()
 
 if __name__ == '__main__':
-    # Initialize API components
-    initialize_api()
+    # Only the reloader child (WERKZEUG_RUN_MAIN=true) serves requests, so only it starts
+    # initializing eagerly; the parent just watches files and restarts the child
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_initialization()
     
     # Start the Flask app
     app.run(debug=True)
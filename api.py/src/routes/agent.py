@@ -1,6 +1,7 @@
 import os
 from flask import Blueprint, request, jsonify
-from _pinecone.retreiver import query_keywords_from_pinecone, search_keywords
+from _pinecone.retreiver import query_keywords_from_pinecone, search_keywords, reindex_default_namespace
+from _pinecone.query_log import log_query
 
 agents_bp = Blueprint('agents_bp', __name__)
 
@@ -31,6 +32,14 @@ def retrive_keywords():
             namespace=namespace
         )
         
+        # Record a sample of queries so they can be replayed to prewarm caches on startup
+        log_query(
+            "keywords",
+            keywords_list,
+            similarity_threshold=similarity_threshold,
+            namespace=namespace
+        )
+        
         return jsonify({
             "response": results,
         }), 200
@@ -73,6 +82,15 @@ def search_keywords_direct():
             namespace=namespace
         )
         
+        # Record a sample of queries so they can be replayed to prewarm caches on startup
+        log_query(
+            "keywords-direct",
+            keywords_list,
+            top_k=top_k,
+            similarity_threshold=similarity_threshold,
+            namespace=namespace
+        )
+        
         return jsonify({
             "success": True,
             "response": results,
@@ -90,3 +108,24 @@ def search_keywords_direct():
             "success": False,
             "error": str(e)
         }), 500
+
+
+@agents_bp.route('/index/reindex-default', methods=['POST'])
+def reindex_default():
+    """
+    Move vectors stored before partitioning from the default namespace into category namespaces.
+    """
+    try:
+        result = reindex_default_namespace()
+        
+        return jsonify({
+            "success": True,
+            "moved": result["moved"],
+            "skipped": result["skipped"]
+        }), 200
+        
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
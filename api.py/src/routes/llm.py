@@ -20,7 +20,7 @@ def llm_query():
 
         # Split the response by comma and pass the list to upsert_text_to_pinecone
         response_list = response.split(',')
-        upsert_text_to_pinecone(response_list)
+        upsert_text_to_pinecone(response_list, topic=data.get('topic'))
 
         return jsonify({"response": response_list}), 200
     except Exception as e:
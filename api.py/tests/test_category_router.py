@@ -0,0 +1,134 @@
+import json
+import numpy as np
+from _pinecone import category_router
+from _pinecone.category_router import CategoryRouter, DEFAULT_NAMESPACE, slugify_topic
+
+
+def _router(tmp_path, model_version="model-a"):
+    return CategoryRouter(model_version, store_dir=tmp_path)
+
+
+def _assign_and_commit(router, texts, vectors, topic=None, topic_vector=None):
+    assignment = router.assign(texts, vectors, topic=topic, topic_vector=topic_vector)
+    router.commit(assignment)
+    return assignment
+
+
+def test_slugify_topic():
+    assert slugify_topic("Machine Learning!") == "machine-learning"
+    assert slugify_topic("???") == "general"
+
+
+def test_without_categories_texts_go_to_default_namespace(tmp_path):
+    router = _router(tmp_path)
+    assignment = router.assign(["python"], [[1.0, 0.0]])
+
+    assert assignment.groups == {DEFAULT_NAMESPACE: ["python"]}
+    assert router.route([1.0, 0.0]) == [DEFAULT_NAMESPACE]
+
+
+def test_topic_seeds_category_and_similar_topic_merges(tmp_path):
+    router = _router(tmp_path)
+    first = _assign_and_commit(router, ["python"], [[1.0, 0.1]], topic="Programming", topic_vector=[1.0, 0.0])
+    second = _assign_and_commit(router, ["java"], [[0.9, 0.1]], topic="Coding", topic_vector=[0.95, 0.05])
+
+    assert first.groups == {"programming": ["python"]}
+    assert second.groups == {"programming": ["java"]}
+    assert router.namespaces == ["programming"]
+
+
+def test_dissimilar_topics_with_same_slug_get_unique_namespaces(tmp_path):
+    router = _router(tmp_path)
+    _assign_and_commit(router, ["templates"], [[1.0, 0.0]], topic="C++", topic_vector=[1.0, 0.0])
+    assignment = _assign_and_commit(router, ["linq"], [[0.0, 1.0]], topic="C#", topic_vector=[0.0, 1.0])
+
+    assert router.namespaces == ["c", "c-2"]
+    assert assignment.groups == {"c-2": ["linq"]}
+
+
+def test_assign_does_not_change_state_until_commit(tmp_path):
+    router = _router(tmp_path)
+    router.assign(["python"], [[1.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0])
+
+    assert router.namespaces == []
+    assert not (tmp_path / category_router.CENTROIDS_FILE).exists()
+
+
+def test_seen_texts_keep_their_first_namespace(tmp_path):
+    router = _router(tmp_path)
+    _assign_and_commit(router, ["python"], [[1.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0])
+    _assign_and_commit(router, ["guitar"], [[0.0, 1.0]], topic="Music", topic_vector=[0.0, 1.0])
+
+    # Even with a vector nearer to "music", a known text stays where it was written
+    assignment = router.assign(["python"], [[0.0, 1.0]])
+    assert assignment.groups == {"programming": ["python"]}
+    assert assignment.counts == {}
+
+
+def test_route_picks_close_categories_and_default_until_reindexed(tmp_path):
+    router = _router(tmp_path)
+    _assign_and_commit(router, ["python"], [[1.0, 0.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0, 0.0])
+    _assign_and_commit(router, ["guitar"], [[0.0, 1.0, 0.0]], topic="Music", topic_vector=[0.0, 1.0, 0.0])
+    _assign_and_commit(router, ["tennis"], [[0.0, 0.0, 1.0]], topic="Sports", topic_vector=[0.0, 0.0, 1.0])
+
+    assert router.route([1.0, 0.0, 0.0]) == ["programming", DEFAULT_NAMESPACE]
+    assert router.route([1.0, 0.95, 0.0]) == ["programming", "music", DEFAULT_NAMESPACE]
+
+    router.mark_default_reindexed()
+    assert router.route([1.0, 0.0, 0.0]) == ["programming"]
+
+
+def test_centroids_persist_across_instances(tmp_path):
+    router = _router(tmp_path)
+    _assign_and_commit(router, ["python"], [[1.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0])
+    router.mark_default_reindexed()
+
+    reopened = _router(tmp_path)
+    assert reopened.namespaces == ["programming"]
+    assert reopened.default_reindexed
+    assert reopened.assign(["python"], [[0.0, 1.0]]).groups == {"programming": ["python"]}
+    assert np.allclose(reopened._sums["programming"], [2.0, 0.0])
+
+
+def test_centroids_for_another_model_are_ignored(tmp_path):
+    _assign_and_commit(_router(tmp_path), ["python"], [[1.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0])
+
+    data = json.loads((tmp_path / category_router.CENTROIDS_FILE).read_text())
+    assert data["model"] == "model-a"
+    assert _router(tmp_path, model_version="model-b").namespaces == []
+
+
+def test_routers_in_other_processes_see_new_categories(tmp_path):
+    first = _router(tmp_path)
+    second = _router(tmp_path)
+
+    _assign_and_commit(first, ["python"], [[1.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0])
+    assert second.namespaces == ["programming"]
+    assert second.route([1.0, 0.0]) == ["programming", DEFAULT_NAMESPACE]
+
+    # A commit from the second router must keep the first router's category
+    _assign_and_commit(second, ["guitar"], [[0.0, 1.0]], topic="Music", topic_vector=[0.0, 1.0])
+    assert _router(tmp_path).namespaces == ["programming", "music"]
+    assert first.assign(["guitar"], [[1.0, 0.0]]).groups == {"music": ["guitar"]}
+
+
+def test_text_assignments_are_appended_not_rewritten(tmp_path):
+    router = _router(tmp_path)
+    _assign_and_commit(router, ["python"], [[1.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0])
+    _assign_and_commit(router, ["java", "python"], [[1.0, 0.1], [1.0, 0.0]])
+
+    lines = (tmp_path / category_router.TEXTS_FILE).read_text().splitlines()
+    assert len(lines) == 2
+    assert all(line.endswith(" programming") for line in lines)
+    assert "python" not in (tmp_path / category_router.CENTROIDS_FILE).read_text()
+
+
+def test_partial_text_log_line_is_not_consumed(tmp_path):
+    router = _router(tmp_path)
+    _assign_and_commit(router, ["python"], [[1.0, 0.0]], topic="Programming", topic_vector=[1.0, 0.0])
+    with open(tmp_path / category_router.TEXTS_FILE, "ab") as f:
+        f.write(b"00ff")
+
+    reopened = _router(tmp_path)
+    assert reopened.assign(["python"], [[0.0, 1.0]]).groups == {"programming": ["python"]}
+    assert len(reopened._text_namespaces) == 1
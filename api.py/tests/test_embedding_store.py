@@ -0,0 +1,120 @@
+import json
+import numpy as np
+from _pinecone import embedding_store
+from _pinecone.embedding_store import EmbeddingStore, StoredEmbeddings
+
+
+DIM = 4
+
+
+def _vector(seed: int):
+    return [float(seed + i) for i in range(DIM)]
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [_vector(len(text)) for text in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return _vector(len(text))
+
+
+def test_add_and_get_round_trip(tmp_path):
+    store = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+    store.add(["python", "go"], [_vector(1), _vector(2)])
+
+    assert len(store) == 2
+    assert store.get("python").tolist() == _vector(1)
+    assert store.lookup("go") == _vector(2)
+    assert store.get("rust") is None
+
+
+def test_add_skips_known_and_duplicate_texts(tmp_path):
+    store = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+    store.add(["python", "python"], [_vector(1), _vector(9)])
+    store.add(["python"], [_vector(5)])
+
+    assert len(store) == 1
+    assert store.lookup("python") == _vector(1)
+
+
+def test_vectors_persist_across_instances(tmp_path):
+    EmbeddingStore("model-a", DIM, store_dir=tmp_path).add(["python"], [_vector(1)])
+
+    reopened = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+    assert len(reopened) == 1
+    assert reopened.lookup("python") == _vector(1)
+
+
+def test_model_change_resets_store(tmp_path):
+    EmbeddingStore("model-a", DIM, store_dir=tmp_path).add(["python"], [_vector(1)])
+
+    reopened = EmbeddingStore("model-b", DIM, store_dir=tmp_path)
+    assert len(reopened) == 0
+    assert reopened.get("python") is None
+
+
+def test_untrusted_keys_are_dropped_on_load(tmp_path):
+    store = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+    store.add(["python", "go"], [_vector(1), _vector(2)])
+
+    # Simulate a crash after the keys were appended but before the count was written
+    meta_path = tmp_path / embedding_store.META_FILE
+    meta = json.loads(meta_path.read_text())
+    meta["count"] = 1
+    meta_path.write_text(json.dumps(meta))
+
+    reopened = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+    assert len(reopened) == 1
+    assert reopened.lookup("python") == _vector(1)
+    assert reopened.get("go") is None
+    assert (tmp_path / embedding_store.KEYS_FILE).stat().st_size == np.dtype(np.uint64).itemsize
+
+    reopened.add(["rust"], [_vector(3)])
+    assert EmbeddingStore("model-a", DIM, store_dir=tmp_path).lookup("rust") == _vector(3)
+
+
+def test_store_grows_past_initial_capacity(tmp_path, monkeypatch):
+    monkeypatch.setattr(embedding_store, "INITIAL_CAPACITY", 2)
+    store = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+
+    texts = [f"skill-{i}" for i in range(5)]
+    for i, text in enumerate(texts):
+        store.add([text], [_vector(i)])
+
+    assert len(store) == 5
+    assert store._capacity >= 5
+    assert [store.lookup(text) for text in texts] == [_vector(i) for i in range(5)]
+
+
+def test_writers_sharing_a_directory_do_not_overwrite_rows(tmp_path):
+    first = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+    second = EmbeddingStore("model-a", DIM, store_dir=tmp_path)
+
+    first.add(["python"], [_vector(1)])
+    second.add(["go"], [_vector(2)])
+    first.add(["rust"], [_vector(3)])
+
+    for store in (first, second, EmbeddingStore("model-a", DIM, store_dir=tmp_path)):
+        assert store.lookup("python") == _vector(1)
+        assert store.lookup("go") == _vector(2)
+    assert len(first) == 3
+
+
+def test_stored_embeddings_only_encode_unseen_texts(tmp_path):
+    fake = FakeEmbeddings()
+    embeddings = StoredEmbeddings(fake, EmbeddingStore("model-a", DIM, store_dir=tmp_path))
+
+    first = embeddings.embed_documents(["python", "go", "python"])
+    second = embeddings.embed_documents(["go", "rust"])
+    query = embeddings.embed_query("python")
+
+    assert fake.calls == [["python", "go"], ["rust"]]
+    assert first == [_vector(6), _vector(2), _vector(6)]
+    assert second == [_vector(2), _vector(4)]
+    assert query == _vector(6)
@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+from _pinecone import partitioned_query
+from _pinecone.category_router import DEFAULT_NAMESPACE
+from _pinecone.partitioned_query import query_partitioned
+
+
+class FakeIndex:
+    def __init__(self, scores_by_namespace):
+        self.scores_by_namespace = scores_by_namespace
+        self.queried = []
+
+    def query(self, vector, top_k, include_metadata, include_values, namespace):
+        self.queried.append(namespace)
+        matches = [
+            SimpleNamespace(id=f"{namespace}-{i}", score=score, metadata={"context": f"{namespace}-{i}"})
+            for i, score in enumerate(self.scores_by_namespace.get(namespace, []))
+        ]
+        return SimpleNamespace(matches=matches[:top_k])
+
+
+class FakeRouter:
+    def __init__(self, routed, namespaces):
+        self.routed = routed
+        self.namespaces = namespaces
+
+    def route(self, query_vector):
+        return list(self.routed)
+
+
+def test_explicit_namespace_is_searched_as_is():
+    index = FakeIndex({"music": [0.9]})
+    router = FakeRouter(["programming"], ["programming", "music"])
+
+    matches = query_partitioned(index, router, [1.0], top_k=5, namespace="music")
+
+    assert index.queried == ["music"]
+    assert [match.id for match in matches] == ["music-0"]
+
+
+def test_routed_hit_skips_fallback_even_with_large_top_k():
+    index = FakeIndex({"programming": [0.8, 0.1], "music": [0.95], "sports": [0.9]})
+    router = FakeRouter(["programming"], ["programming", "music", "sports"])
+
+    matches = query_partitioned(index, router, [1.0], top_k=100, similarity_threshold=0.2)
+
+    assert index.queried == ["programming"]
+    assert [match.score for match in matches] == [0.8, 0.1]
+
+
+def test_routing_miss_falls_back_to_remaining_namespaces():
+    index = FakeIndex({"programming": [0.1], "music": [0.7], "sports": [0.9]})
+    router = FakeRouter(["programming"], ["programming", "music", "sports"])
+
+    matches = query_partitioned(index, router, [1.0], top_k=2, similarity_threshold=0.2)
+
+    assert sorted(index.queried) == ["music", "programming", "sports"]
+    assert [match.score for match in matches] == [0.9, 0.7]
+
+
+def test_routed_namespaces_are_merged_by_score():
+    index = FakeIndex({"programming": [0.5, 0.3], DEFAULT_NAMESPACE: [0.6, 0.4]})
+    router = FakeRouter(["programming", DEFAULT_NAMESPACE], ["programming"])
+
+    matches = query_partitioned(index, router, [1.0], top_k=3, similarity_threshold=0.2)
+
+    assert [match.score for match in matches] == [0.6, 0.5, 0.4]
+
+
+def test_queries_share_a_fixed_size_executor():
+    assert partitioned_query._query_executor._max_workers == partitioned_query.QUERY_MAX_WORKERS
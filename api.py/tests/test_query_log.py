@@ -0,0 +1,102 @@
+import os
+import json
+import pytest
+from _pinecone import query_log
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    path = tmp_path / "query_logs"
+    monkeypatch.setattr(query_log, "QUERY_LOG_DIR", path)
+    monkeypatch.setattr(query_log, "_query_log_handler", None)
+    monkeypatch.setattr(query_log, "_query_log_pid", None)
+    yield path
+    if query_log._query_log_handler is not None:
+        query_log._query_logger.removeHandler(query_log._query_log_handler)
+        query_log._query_log_handler.close()
+
+
+def _entry(keywords, query=None, endpoint="keywords", **params):
+    return json.dumps({"endpoint": endpoint, "keywords": keywords, "query": query or keywords, "params": params}, sort_keys=True)
+
+
+def _read_entries(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_log_query_writes_normalized_and_exact_keywords(log_dir, monkeypatch):
+    monkeypatch.setattr(query_log, "QUERY_LOG_SAMPLE_RATE", 1.0)
+    query_log.log_query("keywords", ["Python ", "django", "python"], similarity_threshold=0.2, namespace="")
+
+    assert _read_entries(log_dir / f"query_log.{os.getpid()}.jsonl") == [{
+        "endpoint": "keywords",
+        "keywords": ["django", "python"],
+        "query": ["Python", "django", "python"],
+        "params": {"namespace": "", "similarity_threshold": 0.2},
+    }]
+
+
+def test_log_query_skips_unsampled_and_empty_queries(log_dir, monkeypatch):
+    monkeypatch.setattr(query_log, "QUERY_LOG_SAMPLE_RATE", 0.0)
+    query_log.log_query("keywords", ["python"])
+
+    monkeypatch.setattr(query_log, "QUERY_LOG_SAMPLE_RATE", 1.0)
+    query_log.log_query("keywords", ["  "])
+    query_log.log_query("keywords", "python")
+
+    assert query_log.load_top_queries() == []
+
+
+def test_each_process_writes_its_own_log(log_dir, monkeypatch):
+    monkeypatch.setattr(query_log, "QUERY_LOG_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(query_log.os, "getpid", lambda: 1000)
+    query_log.log_query("keywords", ["python"])
+
+    # After a fork the child must not keep writing to the parent's file
+    monkeypatch.setattr(query_log.os, "getpid", lambda: 2000)
+    query_log.log_query("keywords", ["go"])
+
+    assert [entry["keywords"] for entry in _read_entries(log_dir / "query_log.1000.jsonl")] == [["python"]]
+    assert [entry["keywords"] for entry in _read_entries(log_dir / "query_log.2000.jsonl")] == [["go"]]
+
+
+def test_load_top_queries_merges_process_and_rotated_logs(log_dir):
+    log_dir.mkdir()
+    (log_dir / "query_log.1000.jsonl").write_text("\n".join([
+        _entry(["go", "python"], ["Python", "Go"], similarity_threshold=0.2),
+        _entry(["go"], similarity_threshold=0.2),
+        "not json",
+    ]) + "\n")
+    (log_dir / "query_log.1000.jsonl.1").write_text(_entry(["go", "python"], ["go", "python"], similarity_threshold=0.2) + "\n")
+    (log_dir / "query_log.2000.jsonl").write_text("\n".join([
+        _entry(["go", "python"], ["Python", "Go"], similarity_threshold=0.2),
+        _entry(["go"], endpoint="keywords-direct", top_k=5),
+    ]) + "\n")
+
+    top_queries = query_log.load_top_queries(top_n=2)
+
+    assert top_queries[0] == ({
+        "endpoint": "keywords",
+        "keywords": ["go", "python"],
+        "query": ["Python", "Go"],
+        "params": {"similarity_threshold": 0.2},
+    }, 3)
+    assert top_queries[1][1] == 1
+    assert len(top_queries) == 2
+
+
+def test_load_top_queries_without_log(log_dir):
+    assert query_log.load_top_queries() == []
+
+
+def test_prune_query_logs_removes_stale_files(log_dir):
+    log_dir.mkdir()
+    stale = log_dir / "query_log.1000.jsonl"
+    fresh = log_dir / "query_log.2000.jsonl"
+    stale.write_text(_entry(["go"]) + "\n")
+    fresh.write_text(_entry(["python"]) + "\n")
+    os.utime(stale, (0, 0))
+
+    assert query_log.prune_query_logs(retention_seconds=60) == 1
+    assert not stale.exists()
+    assert fresh.exists()
@@ -0,0 +1,52 @@
+from _pinecone import result_cache
+from _pinecone.result_cache import ResultCache, normalize_keywords
+
+
+def test_normalize_keywords_ignores_order_case_and_blanks():
+    assert normalize_keywords([" Python", "go ", "python", "", "  "]) == ["go", "python"]
+    assert normalize_keywords(["Go", "PYTHON"]) == normalize_keywords(["python", "go"])
+
+
+def test_get_returns_copy_of_cached_results():
+    cache = ResultCache()
+    cache.set(("query", ("python",)), ["django"])
+
+    results = cache.get(("query", ("python",)))
+    results.append("flask")
+
+    assert cache.get(("query", ("python",))) == ["django"]
+    assert cache.get(("query", ("go",))) is None
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now[0])
+    cache = ResultCache(ttl_seconds=10)
+    cache.set(("key",), ["value"])
+
+    now[0] = 110.0
+    assert cache.get(("key",)) == ["value"]
+
+    now[0] = 110.5
+    assert cache.get(("key",)) is None
+    assert len(cache) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_size=2)
+    cache.set(("a",), ["1"])
+    cache.set(("b",), ["2"])
+    cache.get(("a",))
+    cache.set(("c",), ["3"])
+
+    assert cache.get(("a",)) == ["1"]
+    assert cache.get(("b",)) is None
+    assert cache.get(("c",)) == ["3"]
+
+
+def test_clear_removes_all_entries():
+    cache = ResultCache()
+    cache.set(("a",), ["1"])
+    cache.clear()
+
+    assert cache.get(("a",)) is None